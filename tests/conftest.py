@@ -1,15 +1,20 @@
 """This module contains common Pytest fixtures and hooks for unit tests."""
 
-from six.moves import mock
+try:
+    from unittest import mock  # python3
+except ImportError:
+    import mock  # python2
 
 import py
 from _pytest.config import Config
+from _pytest.config.argparsing import Parser
 from _pytest.main import Session
 from pytest import fixture
 from pluggy._tracing import TagTracer
 
 from pytest_reportportal import RPLogger
 from pytest_reportportal.listener import RPReportListener
+from pytest_reportportal.plugin import pytest_addoption
 from pytest_reportportal.service import PyTestServiceClass
 
 
@@ -19,6 +24,31 @@ def logger():
     return RPLogger('pytest_reportportal.test')
 
 
+@fixture(scope='session')
+def rp_logger_handle():
+    """Patch RPLogger.handle method once per test session."""
+    with mock.patch('pytest_reportportal.RPLogger.handle') as mocked_handle:
+        yield mocked_handle
+
+
+@fixture()
+def mocked_handler(rp_logger_handle):
+    """Provide the patched RPLogger.handle method with a clean call state."""
+    rp_logger_handle.reset_mock()
+    return rp_logger_handle
+
+
+@fixture(scope='session')
+def addoption_parser():
+    """Call pytest_addoption hook once per test session.
+
+    :return: mocked Parser object with the recorded calls
+    """
+    mock_parser = mock.MagicMock(spec=Parser)
+    pytest_addoption(mock_parser)
+    return mock_parser
+
+
 @fixture()
 def mocked_item(mocked_session, mocked_module):
     """Mock Pytest item for testing."""
@@ -62,6 +92,8 @@ def mocked_config():
     mocked_config.option = mock.Mock()
     mocked_config.option.rp_log_batch_size = -1
     mocked_config.option.retries = -1
+    mocked_config.py_test_service = mock.Mock()
+    mocked_config._reporter_config = mock.Mock()
     return mocked_config
 
 
@@ -1,6 +1,9 @@
 """This modules includes unit tests for the listener."""
 
-from six.moves import mock
+try:
+    from unittest import mock  # python3
+except ImportError:
+    import mock  # python2
 
 from delayed_assert import expect, assert_expectations
 import pytest
@@ -1,10 +1,11 @@
 """This modules includes unit tests for the plugin."""
 
-from _pytest.config.argparsing import Parser
 import pytest
-from delayed_assert import expect, assert_expectations
 from requests.exceptions import RequestException
-from six.moves import mock
+try:
+    from unittest import mock  # python3
+except ImportError:
+    import mock  # python2
 
 from reportportal_client.errors import ResponseError
 from pytest_reportportal.config import AgentConfig
@@ -12,7 +13,6 @@ from pytest_reportportal.listener import RPReportListener
 from pytest_reportportal.plugin import (
     is_master,
     log,
-    pytest_addoption,
     pytest_configure,
     pytest_collection_finish,
     pytest_sessionstart,
@@ -23,40 +23,117 @@ from pytest_reportportal.plugin import (
 from pytest_reportportal.service import PyTestServiceClass
 
 
+_EXPECTED_INI_ARGS = (
+    'rp_launch',
+    'rp_launch_id',
+    'rp_launch_description',
+    'rp_project',
+    'rp_log_level',
+    'rp_rerun',
+    'rp_rerun_of',
+    'rp_parent_item_id',
+    'rp_uuid',
+    'rp_endpoint',
+    'rp_launch_attributes',
+    'rp_tests_attributes',
+    'rp_log_batch_size',
+    'rp_ignore_errors',
+    'rp_ignore_attributes',
+    'rp_is_skipped_an_issue',
+    'rp_hierarchy_dirs_level',
+    'rp_hierarchy_dirs',
+    'rp_hierarchy_module',
+    'rp_hierarchy_class',
+    'rp_hierarchy_parametrize',
+    'rp_issue_marks',
+    'rp_issue_system_url',
+    'rp_verify_ssl',
+    'rp_display_suite_test_file',
+    'rp_issue_id_marks',
+    'retries'
+)
+
+_EXPECTED_CLI_ARGS = (
+    '--reportportal',
+    '--rp-launch',
+    '--rp-launch-id',
+    '--rp-launch-description',
+    '--rp-project',
+    '--rp-log-level',
+    '--rp-rerun',
+    '--rp-rerun-of',
+    '--rp-parent-item-id',
+    '--rp-uuid',
+    '--rp-endpoint'
+)
+
+
+@pytest.fixture(autouse=True)
+def mocked_get(monkeypatch):
+    """Stub out HTTP requests and log level lookup for the plugin tests.
+
+    :param monkeypatch: pytest fixture
+    :return: mocked requests.get function
+    """
+    mocked_get = mock.Mock()
+    monkeypatch.setattr('pytest_reportportal.plugin.requests.get', mocked_get)
+    monkeypatch.setattr('pytest_reportportal.config.get_actual_log_level',
+                        mock.Mock(return_value=0))
+    return mocked_get
+
+
+@pytest.fixture
+def patched_time(monkeypatch):
+    """Patch time module and launch wait timeout of the plugin.
+
+    :param monkeypatch: pytest fixture
+    :return: mocked time module
+    """
+    mocked_time = mock.Mock()
+    mocked_time.time.side_effect = [0, 1, 2]
+    monkeypatch.setattr('pytest_reportportal.plugin.time', mocked_time)
+    monkeypatch.setattr('pytest_reportportal.plugin.LAUNCH_WAIT_TIMEOUT', 1)
+    return mocked_time
+
+
+@pytest.fixture(scope='module')
+def agent_config_spec():
+    """Build AgentConfig once to be used as a spec for the module's mocks.
+
+    :return: instance of the AgentConfig class
+    """
+    config = mock.Mock()
+    config.option.rp_log_batch_size = -1
+    config.option.retries = -1
+    with mock.patch('pytest_reportportal.config.get_actual_log_level'):
+        return AgentConfig(config)
+
+
 def test_is_master(mocked_config):
     """Test is_master() function for the correct responses."""
     mocked_config.workerinput = None
-    expect(is_master(mocked_config) is False)
+    assert is_master(mocked_config) is False
     delattr(mocked_config, 'workerinput')
-    expect(is_master(mocked_config) is True)
-    assert_expectations()
-
-
-@mock.patch('pytest_reportportal.RPLogger.handle')
-@pytest.mark.parametrize('log_level', ('info', 'debug', 'warning', 'error'))
-def test_logger_handle_attachment(mock_handler, logger, log_level):
-    """Test logger call for different log levels with some text attachment."""
-    log_call = getattr(logger, log_level)
-    attachment = 'Some {} attachment'.format(log_level)
-    log_call("Some {} message".format(log_level), attachment=attachment)
-    expect(mock_handler.call_count == 1,
-           'logger.handle called more than 1 time')
-    expect(getattr(mock_handler.call_args[0][0], "attachment") == attachment,
-           'record.attachment in args doesn\'t match real value')
-    assert_expectations()
-
-
-@mock.patch('pytest_reportportal.RPLogger.handle')
-@pytest.mark.parametrize('log_level', ('info', 'debug', 'warning', 'error'))
-def test_logger_handle_no_attachment(mock_handler, logger, log_level):
-    """Test logger call for different log levels without any attachment."""
-    log_call = getattr(logger, log_level)
-    log_call('Some {} message'.format(log_level))
-    expect(mock_handler.call_count == 1,
-           'logger.handle called more than 1 time')
-    expect(getattr(mock_handler.call_args[0][0], 'attachment') is None,
-           'record.attachment in args is not None')
-    assert_expectations()
+    assert is_master(mocked_config) is True
+
+
+def test_logger_handle(mocked_handler, logger):
+    """Test logger call for different log levels with and w/o attachment."""
+    errors = []
+    for log_level in ('info', 'debug', 'warning', 'error'):
+        log_call = getattr(logger, log_level)
+        for attachment in ('Some {} attachment'.format(log_level), None):
+            kwargs = {'attachment': attachment} if attachment else {}
+            mocked_handler.reset_mock()
+            log_call('Some {} message'.format(log_level), **kwargs)
+            if mocked_handler.call_count != 1:
+                errors.append('logger.handle called {} times for {} level'
+                              .format(mocked_handler.call_count, log_level))
+            elif getattr(mocked_handler.call_args[0][0],
+                         'attachment') != attachment:
+                errors.append('record.attachment in args doesn\'t match '
+                              'real value for {} level'.format(log_level))
+    assert not errors, errors
 
 
 def test_portal_on_maintenance(mocked_session):
@@ -64,30 +141,23 @@ def test_portal_on_maintenance(mocked_session):
 
     :param mocked_session: pytest fixture
     """
-    mocked_session.config._reporter_config = mock.Mock()
-    mocked_session.config.py_test_service = mock.Mock()
     mocked_session.config.py_test_service.init_service.side_effect = \
         ResponseError("<title>Report Portal - Maintenance</title>")
     pytest_sessionstart(mocked_session)
     assert mocked_session.config.py_test_service.rp is None
 
 
-@mock.patch('pytest_reportportal.plugin.requests.get', mock.Mock())
 def test_pytest_configure(mocked_config):
     """Test plugin successful configuration.
 
-    :param mocked_get:    Instance of the MagicMock
     :param mocked_config: Pytest fixture
     """
     mocked_config.option.rp_enabled = True
     mocked_config.option.rp_project = None
     pytest_configure(mocked_config)
-    expect(mocked_config._reportportal_configured is True)
-    expect(
-        lambda: isinstance(mocked_config.py_test_service, PyTestServiceClass))
-    expect(
-        lambda: isinstance(mocked_config._reporter, RPReportListener))
-    assert_expectations()
+    assert mocked_config._reportportal_configured is True
+    assert isinstance(mocked_config.py_test_service, PyTestServiceClass)
+    assert isinstance(mocked_config._reporter, RPReportListener)
     mocked_config.getoption.assert_has_calls(
         [
             mock.call('--collect-only', default=False),
@@ -96,91 +166,35 @@ def test_pytest_configure(mocked_config):
     )
 
 
-@mock.patch('pytest_reportportal.plugin.requests.get')
-def test_pytest_configure_dry_run(mocked_config):
-    """Test plugin configuration in case of dry-run execution."""
-    mocked_config.getoption.return_value = True
-    pytest_configure(mocked_config)
-    assert mocked_config._reportportal_configured is False
-
-
-@mock.patch('pytest_reportportal.plugin.requests.get', mock.Mock())
-@mock.patch('pytest_reportportal.plugin.log', wraps=log)
-def test_pytest_configure_misssing_rp_endpoint(mocked_log, mocked_config):
-    """Test plugin configuration in case of missing rp_endpoint.
-
-    The value of the _reportportal_configured attribute of the pytest Config
-    object should be changed to False, stopping plugin configuration, if
-    rp_endpoint is not set.
-
-    :param mocked_config: Pytest fixture
-    """
-    mocked_config.option.rp_enabled = True
-    mocked_config.option.rp_endpoint = None
-    mocked_config.getini.return_value = 0
-    pytest_configure(mocked_config)
-    assert mocked_config._reportportal_configured is False
-    mocked_log.debug.assert_has_calls(
-        [
-            mock.call(
-                'One of the following parameters is unset: '
-                'rp_project:{rp_project}, '
-                'rp_endpoint:{rp_endpoint}, '
-                'rp_uuid:{rp_uuid}!'.format(
-                    rp_project=mocked_config.option.rp_project,
-                    rp_endpoint=None,
-                    rp_uuid=mocked_config.option.rp_uuid,
-                )),
-            mock.call('Disabling reporting to RP.'),
-        ]
-    )
-
-
-@mock.patch('pytest_reportportal.plugin.requests.get', mock.Mock())
-@mock.patch('pytest_reportportal.plugin.log', wraps=log)
-def test_pytest_configure_misssing_rp_project(mocked_log, mocked_config):
-    """Test plugin configuration in case of missing rp_project.
-
-    The value of the _reportportal_configured attribute of the pytest Config
-    object should be changed to False, stopping plugin configuration, if
-    rp_project is not set.
+@pytest.mark.parametrize('option_name', ('--collect-only', '--setup-plan'))
+def test_pytest_configure_dry_run(mocked_config, option_name):
+    """Test plugin configuration in case of dry-run execution.
 
     :param mocked_config: Pytest fixture
+    :param option_name:   command-line option, which enables dry-run
     """
-    mocked_config.option.rp_enabled = True
-    mocked_config.option.rp_project = None
-    mocked_config.getini.return_value = 0
+    mocked_config.getoption_side_effects[option_name] = True
     pytest_configure(mocked_config)
     assert mocked_config._reportportal_configured is False
-    mocked_log.debug.assert_has_calls(
-        [
-            mock.call(
-                'One of the following parameters is unset: '
-                'rp_project:{rp_project}, '
-                'rp_endpoint:{rp_endpoint}, '
-                'rp_uuid:{rp_uuid}!'.format(
-                    rp_project=None,
-                    rp_endpoint=mocked_config.option.rp_endpoint,
-                    rp_uuid=mocked_config.option.rp_uuid,
-                )),
-            mock.call('Disabling reporting to RP.'),
-        ]
-    )
 
 
-@mock.patch('pytest_reportportal.plugin.requests.get', mock.Mock())
 @mock.patch('pytest_reportportal.plugin.log', wraps=log)
-def test_pytest_configure_misssing_rp_uuid(mocked_log, mocked_config):
-    """Test plugin configuration in case of missing rp_uuid.
+@pytest.mark.parametrize('option_name',
+                         ('rp_endpoint', 'rp_project', 'rp_uuid'))
+def test_pytest_configure_misssing_major_rp_options(mocked_log, mocked_config,
+                                                    option_name):
+    """Test plugin configuration in case of missing major RP options.
 
     The value of the _reportportal_configured attribute of the pytest Config
     object should be changed to False, stopping plugin configuration, if
-    rp_uuid is not set.
+    rp_project, rp_endpoint or rp_uuid is not set.
 
+    :param mocked_log:    Instance of the MagicMock
     :param mocked_config: Pytest fixture
+    :param option_name:   name of the missing option
     """
     mocked_config.option.rp_enabled = True
-    mocked_config.option.rp_uuid = None
+    setattr(mocked_config.option, option_name, None)
     mocked_config.getini.return_value = 0
     pytest_configure(mocked_config)
     assert mocked_config._reportportal_configured is False
@@ -193,14 +207,13 @@ def test_pytest_configure_misssing_rp_uuid(mocked_log, mocked_config):
                 'rp_uuid:{rp_uuid}!'.format(
                     rp_project=mocked_config.option.rp_project,
                     rp_endpoint=mocked_config.option.rp_endpoint,
-                    rp_uuid=None,
+                    rp_uuid=mocked_config.option.rp_uuid,
                 )),
             mock.call('Disabling reporting to RP.'),
         ]
     )
 
 
-@mock.patch('pytest_reportportal.plugin.requests.get')
 def test_pytest_configure_on_conn_error(mocked_get, mocked_config):
     """Test plugin configuration in case of HTTP error.
 
@@ -218,11 +231,8 @@ def test_pytest_configure_on_conn_error(mocked_get, mocked_config):
     assert mocked_config._reportportal_configured is False
 
 
-@mock.patch('pytest_reportportal.plugin.LAUNCH_WAIT_TIMEOUT', 1)
-@mock.patch('pytest_reportportal.plugin.time')
-def test_wait_launch(time_mock):
+def test_wait_launch(patched_time):
     """Test wait_launch() function for the correct behavior."""
-    time_mock.time.side_effect = [0, 1, 2]
     rp_client = mock.Mock()
     rp_client.launch_id = None
     with pytest.raises(Exception) as err:
@@ -230,144 +240,83 @@ def test_wait_launch(time_mock):
     assert str(err.value) == 'Launch has not started.'
 
 
-def test_pytest_collection_finish(mocked_session):
-    """Test collection_finish with the configured RP plugin.
+def test_plugin_lifecycle(monkeypatch, mocked_session):
+    """Test plugin hooks called in order of the configured pytest session.
 
+    :param monkeypatch:    pytest fixture
     :param mocked_session: pytest fixture
     """
-    mocked_session.config.py_test_service = mock.Mock()
-    pytest_collection_finish(mocked_session)
-    mocked_session.config.py_test_service.collect_tests. \
-        assert_called_with(mocked_session)
-
+    mocked_wait = mock.Mock()
+    monkeypatch.setattr('pytest_reportportal.plugin.PyTestServiceClass',
+                        mock.Mock())
+    monkeypatch.setattr('pytest_reportportal.plugin.wait_launch', mocked_wait)
+    mocked_config = mocked_session.config
+    mocked_config.option.rp_enabled = True
+    mocked_config.option.rp_launch_id = None
+    mocked_config.option.rp_launch_attributes = ['smoke']
+    mocked_config.option.rp_rerun_of = None
+    mocked_config.getini.return_value = []
+    mocked_config.pluginmanager.hasplugin.return_value = True
 
-@mock.patch('pytest_reportportal.plugin.is_master', mock.Mock())
-@mock.patch('pytest_reportportal.plugin.wait_launch')
-def test_pytest_sessionstart(mocked_wait, mocked_session):
-    """Test session configuration if RP plugin is correctly configured.
+    pytest_configure(mocked_config)
+    assert mocked_config._reportportal_configured is True
+    py_test_service = mocked_config.py_test_service
+    mocked_config.pluginmanager.register.assert_called_once_with(
+        mocked_config._reporter)
 
-    :param mocked_wait:    Mocked wait_launch function
-    :param mocked_session: pytest fixture
-    """
-    mocked_session.config.pluginmanager.hasplugin.return_value = True
-    mocked_session.config._reporter_config = mock.Mock(
-        spec=AgentConfig(mocked_session.config))
-    mocked_session.config._reporter_config.rp_launch_attributes = []
-    mocked_session.config._reporter_config.rp_launch_id = None
-    mocked_session.config.py_test_service = mock.Mock()
     pytest_sessionstart(mocked_session)
-    expect(lambda: mocked_session.config.py_test_service.init_service.called)
-    expect(lambda: mocked_session.config.py_test_service.rp is not None)
-    expect(lambda: mocked_session.config.py_test_service.start_launch.called)
-    expect(lambda: mocked_wait.called)
-    assert_expectations()
+    assert py_test_service.init_service.called
+    assert py_test_service.start_launch.called
+    mocked_wait.assert_called_once_with(py_test_service.rp)
+
+    pytest_collection_finish(mocked_session)
+    py_test_service.collect_tests.assert_called_once_with(mocked_session)
+
+    pytest_sessionfinish(mocked_session)
+    py_test_service.finish_launch.assert_called_once_with()
+
+    reporter = mocked_config._reporter
+    pytest_unconfigure(mocked_config)
+    assert not hasattr(mocked_config, '_reporter')
+    mocked_config.pluginmanager.unregister.assert_called_once_with(reporter)
 
 
-@mock.patch('pytest_reportportal.plugin.is_master', mock.Mock())
-@mock.patch('pytest_reportportal.plugin.wait_launch', mock.Mock())
-def test_pytest_sessionstart_with_launch_id(mocked_session):
+def test_pytest_sessionstart_with_launch_id(monkeypatch, mocked_session,
+                                            agent_config_spec):
     """Test session configuration if RP launch ID is set via command-line.
 
-    :param mocked_session: pytest fixture
+    :param monkeypatch:       pytest fixture
+    :param mocked_session:    pytest fixture
+    :param agent_config_spec: pytest fixture
     """
+    monkeypatch.setattr('pytest_reportportal.plugin.is_master', mock.Mock())
+    monkeypatch.setattr('pytest_reportportal.plugin.wait_launch', mock.Mock())
     mocked_session.config.pluginmanager.hasplugin.return_value = True
     mocked_session.config._reporter_config = mock.Mock(
-        spec=AgentConfig(mocked_session.config))
+        spec=agent_config_spec)
     mocked_session.config._reporter_config.rp_launch_attributes = []
     mocked_session.config._reporter_config.rp_launch_id = 1
-    mocked_session.config.py_test_service = mock.Mock()
     pytest_sessionstart(mocked_session)
-    expect(lambda: mocked_session.config.py_test_service.start_launch.
-           assert_not_called())
-    assert_expectations()
-
-
-@mock.patch('pytest_reportportal.plugin.is_master', mock.Mock())
-def test_pytest_sessionfinish(mocked_session):
-    """Test sessionfinish with the configured RP plugin.
-
-    :param mocked_session: pytest fixture
-    """
-    mocked_session.config.py_test_service = mock.Mock()
-    mocked_session.config.option.rp_launch_id = None
-    pytest_sessionfinish(mocked_session)
-    assert mocked_session.config.py_test_service.finish_launch.called
-
-
-def test_pytest_unconfigure(mocked_config):
-    """Test unconfigure with the configured RP plugin.
-
-    :param mocked_config: pytest fixture
-    """
-    mocked_config._reporter = mock.Mock()
-    mocked_config.pluginmanager.unregister = mock.Mock()
-    pytest_unconfigure(mocked_config)
-    assert not hasattr(mocked_config, '_reporter')
+    mocked_session.config.py_test_service.start_launch.assert_not_called()
 
 
-def test_pytest_addoption_adds_correct_ini_file_arguments():
+def test_pytest_addoption_adds_correct_ini_file_arguments(addoption_parser):
     """Test the correct list of options are available in the .ini file."""
-    expected_argument_names = (
-        'rp_launch',
-        'rp_launch_id',
-        'rp_launch_description',
-        'rp_project',
-        'rp_log_level',
-        'rp_rerun',
-        'rp_rerun_of',
-        'rp_parent_item_id',
-        'rp_uuid',
-        'rp_endpoint',
-        'rp_launch_attributes',
-        'rp_tests_attributes',
-        'rp_log_batch_size',
-        'rp_ignore_errors',
-        'rp_ignore_attributes',
-        'rp_is_skipped_an_issue',
-        'rp_hierarchy_dirs_level',
-        'rp_hierarchy_dirs',
-        'rp_hierarchy_module',
-        'rp_hierarchy_class',
-        'rp_hierarchy_parametrize',
-        'rp_issue_marks',
-        'rp_issue_system_url',
-        'rp_verify_ssl',
-        'rp_display_suite_test_file',
-        'rp_issue_id_marks',
-        'retries'
-    )
-    mock_parser = mock.MagicMock(spec=Parser)
-
-    pytest_addoption(mock_parser)
-
-    added_argument_names = []
-    for args, kwargs in mock_parser.addini.call_args_list:
-        added_argument_names.append(args[0] if args else kwargs.get("name"))
-    assert tuple(added_argument_names) == expected_argument_names
+    added_argument_names = [
+        args[0] if args else kwargs.get('name')
+        for args, kwargs in addoption_parser.addini.call_args_list
+    ]
+    assert tuple(added_argument_names) == _EXPECTED_INI_ARGS
 
 
-def test_pytest_addoption_adds_correct_command_line_arguments():
+def test_pytest_addoption_adds_correct_command_line_arguments(
+        addoption_parser):
     """Test the correct list of options are available in the command line."""
-    expected_argument_names = (
-        '--reportportal',
-        '--rp-launch',
-        '--rp-launch-id',
-        '--rp-launch-description',
-        '--rp-project',
-        '--rp-log-level',
-        '--rp-rerun',
-        '--rp-rerun-of',
-        '--rp-parent-item-id',
-        '--rp-uuid',
-        '--rp-endpoint'
-    )
-    mock_parser = mock.MagicMock(spec=Parser)
-    mock_reporting_group = mock_parser.getgroup.return_value
-
-    pytest_addoption(mock_parser)
-
-    mock_parser.getgroup.assert_called_once_with("reporting")
-    added_argument_names = []
-    for args, kwargs in mock_reporting_group.addoption.call_args_list:
-        added_argument_names.append(args[0] if args else kwargs.get("name"))
-    assert tuple(added_argument_names) == expected_argument_names
+    mock_reporting_group = addoption_parser.getgroup.return_value
+
+    addoption_parser.getgroup.assert_called_once_with('reporting')
+    added_argument_names = [
+        args[0] if args else kwargs.get('name')
+        for args, kwargs in mock_reporting_group.addoption.call_args_list
+    ]
+    assert tuple(added_argument_names) == _EXPECTED_CLI_ARGS